@@ -0,0 +1,227 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Hand-written state machine behind _strip_common.strip_comments.
+
+The pure-Python transform spends most of its time on per-line interpreter
+dispatch; this extension walks the raw bytes once in C, tracking line
+boundaries, string and char literals, and `//` detection in a single
+pass. Lines are `\n`-delimited, matching _strip_common._iter_lines: a
+bare CR byte is never a line boundary. Build it in place with:
+
+    cythonize -3 -i scripts/_strip.pyx
+
+_strip_common imports it when available and falls back to the Python
+implementation otherwise, so building it is optional.
+"""
+
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_GET_SIZE
+
+
+cdef inline bint _is_space(unsigned char c) noexcept:
+    return c == 32 or (9 <= c <= 13)
+
+
+cdef inline bint _is_word(unsigned char c) noexcept:
+    return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95
+
+
+cdef bint _ci_prefix(const unsigned char* d, Py_ssize_t i, Py_ssize_t end,
+                     const char* word) noexcept:
+    """Case-insensitive prefix compare of d[i:end) against `word`."""
+    cdef Py_ssize_t k = 0
+    cdef unsigned char c, w
+    while word[k] != 0:
+        if i + k >= end:
+            return False
+        c = d[i + k]
+        w = <unsigned char>word[k]
+        # |0x20 folds case exactly for ASCII letters, which is all the
+        # callers ever pass.
+        if (c | 0x20) != (w | 0x20):
+            return False
+        k += 1
+    return True
+
+
+cdef bint _verb_at(const unsigned char* d, Py_ssize_t i, Py_ssize_t end,
+                   const char* verb) noexcept:
+    """Like _ci_prefix but additionally requires a word boundary after."""
+    cdef Py_ssize_t k = 0
+    while verb[k] != 0:
+        k += 1
+    if not _ci_prefix(d, i, end, verb):
+        return False
+    if i + k < end and _is_word(d[i + k]):
+        return False
+    return True
+
+
+cdef bint _has_trivial(const unsigned char* d, Py_ssize_t s,
+                       Py_ssize_t e) noexcept:
+    """Word-boundary search for the trivial verbs in d[s:e)."""
+    cdef Py_ssize_t i
+    cdef unsigned char c
+    for i in range(s, e):
+        if i > s and _is_word(d[i - 1]):
+            continue
+        c = d[i] | 0x20
+        if c == 0x75:  # u
+            if _verb_at(d, i, e, "update"):
+                return True
+        elif c == 0x73:  # s
+            if _verb_at(d, i, e, "set"):
+                return True
+        elif c == 0x67:  # g
+            if _verb_at(d, i, e, "get"):
+                return True
+        elif c == 0x72:  # r
+            if _verb_at(d, i, e, "return"):
+                return True
+        elif c == 0x63:  # c
+            if _verb_at(d, i, e, "create") or _verb_at(d, i, e, "check"):
+                return True
+        elif c == 0x69:  # i
+            if _verb_at(d, i, e, "init"):
+                return True
+        elif c == 0x76:  # v
+            if _verb_at(d, i, e, "validate"):
+                return True
+        elif c == 0x68:  # h
+            if _verb_at(d, i, e, "handle"):
+                return True
+        elif c == 0x70:  # p
+            if _verb_at(d, i, e, "process"):
+                return True
+        elif c == 0x6C:  # l
+            if _verb_at(d, i, e, "load"):
+                return True
+    return False
+
+
+cdef bint _preserved(const unsigned char* d, Py_ssize_t ss,
+                     Py_ssize_t se) noexcept:
+    """Preserve check for a stripped line known to start with '//'."""
+    cdef Py_ssize_t j = ss + 2
+    if j < se and (d[j] == 0x21 or d[j] == 0x2F):  # '!' or '/'
+        return True
+    while j < se and _is_space(d[j]):
+        j += 1
+    return (_ci_prefix(d, j, se, "TODO") or _ci_prefix(d, j, se, "FIXME")
+            or _ci_prefix(d, j, se, "NOTE") or _ci_prefix(d, j, se, "SAFETY")
+            or _ci_prefix(d, j, se, "HACK") or _ci_prefix(d, j, se, "XXX"))
+
+
+cdef Py_ssize_t _find_comment(const unsigned char* d, Py_ssize_t start,
+                              Py_ssize_t end) noexcept:
+    """First '//' in d[start:end) outside complete string/char literals.
+
+    Mirrors the tokenizing regex: a literal only shields its contents when
+    it closes on the same line, and '///' / '//!' are stepped over one
+    byte at a time exactly as the regex scan would.
+    """
+    cdef Py_ssize_t i = start, k
+    cdef unsigned char c, q
+    cdef bint closed
+    while i < end:
+        c = d[i]
+        if c == 0x22 or c == 0x27:  # '"' or "'"
+            q = c
+            k = i + 1
+            closed = False
+            while k < end:
+                if d[k] == 0x5C:  # backslash escape
+                    if k + 1 >= end:
+                        break
+                    k += 2
+                    continue
+                if d[k] == q:
+                    closed = True
+                    k += 1
+                    break
+                k += 1
+            if closed:
+                i = k
+            else:
+                i += 1
+            continue
+        if c == 0x2F and i + 1 < end and d[i + 1] == 0x2F:
+            if i + 2 >= end or (d[i + 2] != 0x2F and d[i + 2] != 0x21):
+                return i
+            i += 1
+            continue
+        i += 1
+    return -1
+
+
+def strip(bytes content, bint drop_all=False):
+    """Single-pass equivalent of _strip_common.strip_comments.
+
+    Returns (changed, rewritten content, number of comments removed).
+    """
+    if b'//' not in content:
+        return False, content, 0
+
+    cdef const unsigned char* d = <const unsigned char*>PyBytes_AS_STRING(content)
+    cdef Py_ssize_t n = PyBytes_GET_SIZE(content)
+    cdef Py_ssize_t i = 0, ls, be, ss, se, pos, cs, ce
+    cdef Py_ssize_t removed = 0
+    cdef bint in_header = True, has_nl, trimmed
+    out = bytearray()
+
+    while i < n:
+        ls = i
+        while i < n and d[i] != 0x0A:
+            i += 1
+        be = i
+        has_nl = i < n
+        if has_nl:
+            i += 1
+        ss = ls
+        while ss < be and _is_space(d[ss]):
+            ss += 1
+        se = be
+        while se > ss and _is_space(d[se - 1]):
+            se -= 1
+        if in_header:
+            if ss < se and (d[ss] == 0x2A or (d[ss] == 0x2F and ss + 1 < se
+                                              and d[ss + 1] == 0x2A)):
+                out += content[ls:i]
+                continue
+            if ss < se:
+                in_header = False
+        pos = _find_comment(d, ls, be)
+        if pos < 0:
+            out += content[ls:i]
+            continue
+        if ss + 1 < se and d[ss] == 0x2F and d[ss + 1] == 0x2F:
+            if _preserved(d, ss, se):
+                out += content[ls:i]
+                continue
+            cs = pos + 2
+            while cs < be and _is_space(d[cs]):
+                cs += 1
+            ce = be
+            while ce > cs and _is_space(d[ce - 1]):
+                ce -= 1
+            if drop_all or ce - cs < 15 or _has_trivial(d, cs, ce):
+                removed += 1
+                continue
+            out += content[ls:i]
+            continue
+        removed += 1
+        ce = pos
+        while ce > ls and _is_space(d[ce - 1]):
+            ce -= 1
+        if ce > ls:
+            out += content[ls:ce]
+            if has_nl:
+                out += b'\n'
+
+    cs = len(out)
+    ce = cs
+    while ce > 0 and out[ce - 1] == 0x0A:
+        ce -= 1
+    trimmed = cs - ce >= 3
+    if trimmed:
+        del out[ce:]
+        out += b'\n\n'
+    return removed > 0 or trimmed, bytes(out), removed
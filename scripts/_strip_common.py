@@ -0,0 +1,290 @@
+"""Shared machinery for the comment-cleanup scripts.
+
+Both passes — the inline/trivial cleanup in remove_line_comments.py and
+the drop-everything pass in remove_single_line_comments.py — used to walk
+the tree, read, transform, and rewrite each file independently, doubling
+the I/O when a repo wanted both. They now share one scandir walk, one
+mmap-backed process_file, and one fused transform that applies the
+preserve rules and the string-literal-aware `//` detection in a single
+pass over each file.
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+PRESERVE_PATTERNS = [
+    rb'^\s*//!',
+    rb'^\s*///',
+    rb'^\s*//\s*TODO',
+    rb'^\s*//\s*FIXME',
+    rb'^\s*//\s*NOTE',
+    rb'^\s*//\s*SAFETY',
+    rb'^\s*//\s*HACK',
+    rb'^\s*//\s*XXX',
+]
+
+# Compiled once at import: a single alternation is one C-level match per line
+# instead of eight separate re.match calls.
+_PRESERVE_RE = re.compile(
+    b'|'.join(b'(?:%s)' % p for p in PRESERVE_PATTERNS), re.IGNORECASE
+)
+
+# Standalone comments containing only boilerplate verbs are dropped; one
+# compiled alternation replaces a Python-level phrase loop.
+_TRIVIAL_RE = re.compile(
+    rb'\b(update|set|get|return|create|init|check|validate|handle|process|load)\b'
+)
+
+# First bytes of the trivial verbs; a comment containing none of them can
+# never match _TRIVIAL_RE, so the regex scan is skipped outright.
+_TRIVIAL_FIRST = frozenset(b'usgrcivhpl')
+
+# String and char literals are consumed before the `//` alternative can
+# match, so any `//` found by this pattern is guaranteed to sit outside
+# a literal.
+_TOKEN_RE = re.compile(
+    rb'"(?:\\.|[^"\\\n])*"'
+    rb"|'(?:\\.|[^'\\\n])*'"
+    rb'|//(?!/|!)'
+)
+
+# Cheap per-line prefilter before the tokenizing scan.
+_COMMENT_RE = re.compile(rb'//(?!/|!)')
+
+# Runs of blank lines left at EOF by dropped comments collapse to one.
+_TRAILING_RE = re.compile(rb'\n{3,}\Z')
+
+# One keepends line per match, split on '\n' only. splitlines would also
+# break on a bare CR byte, tearing lines (and string literals holding a
+# CR) apart before the transform ever sees them.
+_LINE_RE = re.compile(rb'[^\n]*\n?')
+
+try:
+    # Optional compiled state machine (cythonize -3 -i scripts/_strip.pyx);
+    # same contract as strip_comments but the whole pass runs in C.
+    from _strip import strip as _strip_ext
+except ImportError:
+    _strip_ext = None
+
+
+def should_preserve_comment(line):
+    """Return True when the comment on this line must be kept."""
+    return _PRESERVE_RE.match(line) is not None
+
+
+def find_comment_start(line):
+    """Return the index of the first `//` outside string literals, or -1."""
+    for match in _TOKEN_RE.finditer(line):
+        if match.group().startswith(b'//'):
+            return match.start()
+    return -1
+
+
+def _iter_lines(source):
+    """Yield `\\n`-delimited keepends lines of `source`.
+
+    The single line-splitting definition every path goes through; a bare
+    CR is an ordinary in-line byte, never a boundary. Accepts bytes or a
+    binary file object, whose own iteration already has exactly these
+    semantics.
+    """
+    if isinstance(source, bytes):
+        for match in _LINE_RE.finditer(source):
+            line = match.group()
+            if line:
+                yield line
+    else:
+        yield from source
+
+
+def strip_lines(lines, drop_all=False, removed=None):
+    """Core transform as a generator over keepends lines.
+
+    Consumes any iterable of bytes lines — including an open binary
+    file — and yields the lines that survive. `removed`, when given, is
+    a one-slot list accumulating the number of comments stripped, since
+    a generator cannot also return a count.
+    """
+    box = removed if removed is not None else [0]
+    in_header = True
+    for line in lines:
+        nl = b'\n' if line.endswith(b'\n') else b''
+        body = line[:-1] if nl else line
+        # One strip per line; every branch below reuses it.
+        stripped = body.strip()
+        if in_header:
+            if stripped.startswith((b'/*', b'*', b'*/')):
+                yield line
+                continue
+            if stripped:
+                in_header = False
+        if not _COMMENT_RE.search(body):
+            yield line
+            continue
+        if _PRESERVE_RE.match(body) is not None:
+            yield line
+            continue
+        pos = find_comment_start(body)
+        if pos < 0:
+            yield line
+            continue
+        if stripped.startswith(b'//'):
+            # Standalone comment: drop it when stripping everything or
+            # when trivial.
+            comment_text = body[pos + 2:].strip().lower()
+            if drop_all or len(comment_text) < 15 or (
+                    _TRIVIAL_FIRST.intersection(comment_text)
+                    and _TRIVIAL_RE.search(comment_text) is not None):
+                box[0] += 1
+                continue
+            yield line
+            continue
+        box[0] += 1
+        code = body[:pos].rstrip()
+        if code:
+            yield code + nl
+
+
+def strip_comments(content, drop_all=False):
+    """Strip `//` comments from `content` in a single pass.
+
+    With drop_all False, inline comments and trivial standalone comments
+    are removed; with drop_all True every plain `//` comment goes. Either
+    way doc comments (`///`, `//!`), marker comments (TODO, FIXME, NOTE,
+    SAFETY, HACK, XXX), the leading file-header block, and `//` sequences
+    inside string or char literals are left alone.
+
+    Returns (changed, rewritten content, number of comments removed);
+    `changed` flips the moment any line is dropped or modified, so callers
+    never need to compare the full before/after contents.
+    """
+    if _strip_ext is not None:
+        return _strip_ext(content, drop_all)
+    # bytes.__contains__ is a vectorized memmem; comment-free files skip
+    # the whole per-line pass.
+    if b'//' not in content:
+        return False, content, 0
+    removed = [0]
+    # Keepends iteration lets dropped lines take their newline with them
+    # and avoids allocating a second full-size list for the rejoin.
+    out = b''.join(strip_lines(_iter_lines(content),
+                               drop_all=drop_all, removed=removed))
+    trimmed, n_trimmed = _TRAILING_RE.subn(b'\n\n', out)
+    return removed[0] > 0 or n_trimmed > 0, trimmed, removed[0]
+
+
+def _iter_rs(root):
+    """Yield paths of `.rs` files under `root` without per-entry stat calls."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.rs'):
+                    yield entry.path
+
+
+def _count_changes(file_path, drop_all):
+    """Dry-run path: stream line by line without buffering the output.
+
+    Memory stays constant per worker no matter how large a generated
+    file is; only the removal count and enough trailing-blank state to
+    predict the EOF trim are kept.
+    """
+    removed = [0]
+    saw_comment = [False]
+    tail_blanks = 0
+    last_had_nl = False
+
+    def _watch(f):
+        for line in f:
+            if not saw_comment[0] and b'//' in line:
+                saw_comment[0] = True
+            yield line
+
+    with open(file_path, 'rb') as f:
+        for out_line in strip_lines(_watch(_iter_lines(f)),
+                                    drop_all=drop_all, removed=removed):
+            if out_line == b'\n':
+                tail_blanks += 1
+            else:
+                tail_blanks = 0
+                last_had_nl = out_line.endswith(b'\n')
+    if not saw_comment[0]:
+        # Mirror the apply path: files without any '//' are left alone,
+        # trailing blanks included.
+        return False, 0
+    trailing_nl = tail_blanks + (1 if last_had_nl else 0)
+    if removed[0] > 0 or trailing_nl >= 3:
+        return True, removed[0]
+    return False, 0
+
+
+def process_file(file_path, dry_run=False, drop_all=False):
+    """Process a single file; returns (modified, removed_count)."""
+    if dry_run:
+        return _count_changes(file_path, drop_all)
+    with open(file_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped and have nothing to strip.
+            return False, 0
+        with mm:
+            # Scan the mapped pages directly; comment-free files are
+            # rejected without ever copying into a bytes object.
+            if mm.find(b'//') < 0:
+                return False, 0
+            content = bytes(mm)
+    changed, new_content, removed = strip_comments(content, drop_all=drop_all)
+    if not changed:
+        return False, 0
+    if not dry_run:
+        with open(file_path, 'wb') as f:
+            f.write(new_content)
+    return True, removed
+
+
+def run(description, drop_all):
+    """Parse arguments and run one cleanup pass over the requested tree."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('path', help='file or directory to process')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report what would change without writing')
+    parser.add_argument('--exclude', action='append', default=[],
+                        help='skip paths containing this substring (repeatable)')
+    args = parser.parse_args()
+
+    if os.path.isfile(args.path):
+        files = [args.path]
+    else:
+        files = sorted(_iter_rs(args.path))
+    if args.exclude:
+        # One multi-pattern scan per path instead of a Python-level loop
+        # over every exclude substring.
+        excl_re = re.compile('|'.join(map(re.escape, args.exclude)))
+        files = [f for f in files if not excl_re.search(f)]
+
+    total_files = 0
+    total_removed = 0
+    action = 'would remove' if args.dry_run else 'removed'
+    # Files are independent transforms, so fan out across cores; each
+    # worker pays the regex compile cost once at module import.
+    worker = partial(process_file, dry_run=args.dry_run, drop_all=drop_all)
+    msgs = []
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(worker, files, chunksize=32)
+        for file_path, (modified, removed) in zip(files, results):
+            if modified:
+                total_files += 1
+                total_removed += removed
+                msgs.append(f'{file_path}: {action} {removed} comment(s)\n')
+    # One write instead of a syscall per modified file.
+    msgs.append(f'{total_files} file(s) changed, {total_removed} comment(s) removed\n')
+    sys.stdout.write(''.join(msgs))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Remove inline and trivial standalone `//` comments from Rust sources.
+
+Doc comments (`///`, `//!`) and marker comments (TODO, FIXME, NOTE, SAFETY,
+HACK, XXX) are always preserved. Run from the repository root:
+
+    python scripts/remove_line_comments.py src --dry-run
+
+The walk, file handling, and fused transform live in _strip_common.py so
+that running this pass and remove_single_line_comments.py back to back
+does not read and rewrite every file twice.
+"""
+
+from _strip_common import run
+
+if __name__ == '__main__':
+    run('Remove inline and trivial // comments from Rust sources.',
+        drop_all=False)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Remove non-doc `//` comments from Rust sources, string-literal aware.
+
+Unlike remove_line_comments.py this pass drops every plain `//` comment,
+standalone or trailing, but it never touches `//` sequences inside string
+or char literals and it keeps the leading file-header comment block.
+
+    python scripts/remove_single_line_comments.py src --dry-run
+
+The walk, file handling, and fused transform live in _strip_common.py so
+that running this pass and remove_line_comments.py back to back does not
+read and rewrite every file twice.
+"""
+
+from _strip_common import run
+
+if __name__ == '__main__':
+    run('Remove plain // comments from Rust sources.', drop_all=True)